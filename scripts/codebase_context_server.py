@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Long-running local server that hands codebase context to LLM clients.
+Instead of regenerating a full text dump, it keeps an in-memory index of the
+files write_code_to_text.py would include and answers JSON-RPC 2.0 requests
+(list, tree, read, search) over stdio or a local TCP socket. File contents are
+read lazily and kept in an LRU cache that is invalidated when a file's mtime changes.
+"""
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import threading
+from collections import OrderedDict
+
+from write_code_to_text import (
+    ALWAYS_SKIP_SIZE,
+    MAX_READABLE_SIZE,
+    generate_tree_from_paths,
+    get_root_dir,
+    is_binary_file,
+    load_gitignore_pathspecs,
+    scan_codebase,
+)
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+FILE_NOT_FOUND = -32001
+BINARY_FILE = -32002
+
+
+class RpcError(Exception):
+    """Error that is reported back to the client as a JSON-RPC error object."""
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def string_param(name, value):
+    """Validate an optional string parameter, treating None as an empty string."""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise RpcError(INVALID_PARAMS, f"'{name}' must be a string")
+    return value
+
+
+def int_param(name, value, minimum=1):
+    """Validate an optional integer parameter with a lower bound, passing None through."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RpcError(INVALID_PARAMS, f"'{name}' must be an integer")
+    if value < minimum:
+        raise RpcError(INVALID_PARAMS, f"'{name}' must be at least {minimum}")
+    return value
+
+
+def bool_param(name, value):
+    """Validate a boolean parameter."""
+    if not isinstance(value, bool):
+        raise RpcError(INVALID_PARAMS, f"'{name}' must be a boolean")
+    return value
+
+
+class ContentCache:
+    """LRU cache of file contents bounded by the total number of characters held."""
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.total_chars = 0
+        self.entries = OrderedDict()
+
+    def get(self, rel_path, mtime):
+        """Return cached content for rel_path, or None if missing or stale."""
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            return None
+        if entry[0] != mtime:
+            self.invalidate(rel_path)
+            return None
+        self.entries.move_to_end(rel_path)
+        return entry[1]
+
+    def put(self, rel_path, mtime, content):
+        """Store content, evicting the least recently used entries to stay in budget."""
+        self.invalidate(rel_path)
+        if len(content) > self.max_chars:
+            return
+        self.entries[rel_path] = (mtime, content)
+        self.total_chars += len(content)
+        while self.total_chars > self.max_chars:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total_chars -= len(evicted)
+
+    def invalidate(self, rel_path):
+        """Drop a single entry from the cache."""
+        entry = self.entries.pop(rel_path, None)
+        if entry is not None:
+            self.total_chars -= len(entry[1])
+
+
+class CodebaseIndex:
+    """In-memory index of the snapshot file set with lazily loaded contents.
+
+    Args:
+        root_dir: Project root directory
+        respect_gitignore: Whether to respect gitignore rules
+        cache_chars: Maximum number of characters kept in the content cache
+        rescan_interval: Minimum seconds between metadata rescans of the tree
+    """
+    def __init__(self, root_dir, respect_gitignore=True, cache_chars=64 * 1024 * 1024,
+                 rescan_interval=5.0):
+        self.root_dir = root_dir
+        self.respect_gitignore = respect_gitignore
+        self.rescan_interval = rescan_interval
+        self.cache = ContentCache(cache_chars)
+        self.files = {}
+        self.last_scan = 0.0
+        self.lock = threading.RLock()
+        self.rescan()
+
+    def rescan(self):
+        """Rebuild the metadata index (paths, sizes, mtimes) without reading contents.
+        Files the snapshot always skips for size are left out."""
+        root_pathspec, additional_pathspecs = load_gitignore_pathspecs(self.root_dir)
+        files = {}
+        for rel_path, file_path in scan_codebase(self.root_dir, root_pathspec, additional_pathspecs,
+                                                 self.respect_gitignore):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if stat.st_size > ALWAYS_SKIP_SIZE:
+                continue
+            files[rel_path.replace(os.path.sep, '/')] = {
+                'path': file_path,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+            }
+        with self.lock:
+            for rel_path, entry in self.files.items():
+                if rel_path not in files or files[rel_path]['mtime'] != entry['mtime']:
+                    self.cache.invalidate(rel_path)
+            self.files = files
+            self.last_scan = time.time()
+
+    def refresh(self):
+        """Rescan the tree if the last scan is older than rescan_interval."""
+        if time.time() - self.last_scan >= self.rescan_interval:
+            self.rescan()
+
+    def entry(self, rel_path):
+        """Look up an index entry, re-stating the file so mtime changes are picked up."""
+        rel_path = rel_path.replace('\\', '/').lstrip('/')
+        with self.lock:
+            entry = self.files.get(rel_path)
+        if entry is None and os.path.isfile(os.path.join(self.root_dir, rel_path)):
+            # Created since the last scan; rescanning applies the usual ignore rules
+            self.rescan()
+            with self.lock:
+                entry = self.files.get(rel_path)
+        if entry is None:
+            raise RpcError(FILE_NOT_FOUND, f"File not in snapshot: {rel_path}")
+        try:
+            stat = os.stat(entry['path'])
+        except OSError:
+            with self.lock:
+                self.files.pop(rel_path, None)
+                self.cache.invalidate(rel_path)
+            raise RpcError(FILE_NOT_FOUND, f"File no longer exists: {rel_path}")
+        if stat.st_size > ALWAYS_SKIP_SIZE:
+            with self.lock:
+                self.files.pop(rel_path, None)
+                self.cache.invalidate(rel_path)
+            raise RpcError(FILE_NOT_FOUND, f"File not in snapshot: {rel_path}")
+        if stat.st_mtime != entry['mtime'] or stat.st_size != entry['size']:
+            with self.lock:
+                entry['mtime'] = stat.st_mtime
+                entry['size'] = stat.st_size
+                self.cache.invalidate(rel_path)
+        return rel_path, entry
+
+    def content(self, rel_path):
+        """Return the text content of a file, reading it from disk only on a cache miss.
+        Like the snapshot, only the first MAX_READABLE_SIZE characters are kept."""
+        rel_path, entry = self.entry(rel_path)
+        with self.lock:
+            content = self.cache.get(rel_path, entry['mtime'])
+        if content is not None:
+            return content
+        if is_binary_file(entry['path']):
+            raise RpcError(BINARY_FILE, f"File is binary: {rel_path}")
+        with open(entry['path'], 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read(MAX_READABLE_SIZE)
+        if entry['size'] > MAX_READABLE_SIZE:
+            content += "\n\n... [content truncated] ...\n\n"
+        with self.lock:
+            self.cache.put(rel_path, entry['mtime'], content)
+        return content
+
+    def paths(self, prefix=''):
+        """Return the sorted list of indexed paths under an optional prefix."""
+        self.refresh()
+        prefix = prefix.replace('\\', '/').lstrip('/')
+        with self.lock:
+            return sorted(p for p in self.files if p.startswith(prefix))
+
+    def handle_list(self, prefix=''):
+        """List indexed files with their size and modification time."""
+        paths = self.paths(string_param('prefix', prefix))
+        with self.lock:
+            return [
+                {'path': p, 'size': self.files[p]['size'], 'mtime': self.files[p]['mtime']}
+                for p in paths if p in self.files
+            ]
+
+    def handle_tree(self, prefix=''):
+        """Render the indexed files as the same [DIR]/[FILE] tree used in the text dump."""
+        tree = generate_tree_from_paths(self.paths(string_param('prefix', prefix)))
+        return '\n'.join(tree)
+
+    def handle_read(self, path, start_line=None, end_line=None):
+        """Read a file, optionally limited to an inclusive 1-based line range."""
+        if not isinstance(path, str) or not path:
+            raise RpcError(INVALID_PARAMS, "'path' must be a non-empty string")
+        start_line = int_param('start_line', start_line)
+        end_line = int_param('end_line', end_line)
+        if start_line is not None and end_line is not None and start_line > end_line:
+            raise RpcError(INVALID_PARAMS, "'start_line' must not be greater than 'end_line'")
+
+        rel_path, entry = self.entry(path)
+        content = self.content(rel_path)
+        lines = content.splitlines(keepends=True)
+        start = start_line or 1
+        end = min(end_line or len(lines), len(lines))
+        return {
+            'path': path,
+            'start_line': start,
+            'end_line': end,
+            'total_lines': len(lines),
+            'content': ''.join(lines[start - 1:end]),
+            'truncated': entry['size'] > MAX_READABLE_SIZE,
+        }
+
+    def handle_search(self, query, regex=False, ignore_case=False, prefix='', max_results=100):
+        """Search file contents line by line and return matching locations."""
+        if not isinstance(query, str) or not query:
+            raise RpcError(INVALID_PARAMS, "'query' must be a non-empty string")
+        prefix = string_param('prefix', prefix)
+        max_results = int_param('max_results', max_results)
+        if max_results is None:
+            raise RpcError(INVALID_PARAMS, "'max_results' must be an integer")
+        flags = re.IGNORECASE if bool_param('ignore_case', ignore_case) else 0
+        try:
+            pattern = re.compile(query if bool_param('regex', regex) else re.escape(query), flags)
+        except re.error as e:
+            raise RpcError(INVALID_PARAMS, f"Invalid regular expression: {str(e)}")
+
+        results = []
+        for rel_path in self.paths(prefix):
+            try:
+                content = self.content(rel_path)
+            except (RpcError, OSError):
+                continue
+            for line_number, line in enumerate(content.splitlines(), start=1):
+                if pattern.search(line):
+                    results.append({'path': rel_path, 'line': line_number, 'text': line})
+                    if len(results) >= max_results:
+                        return results
+        return results
+
+
+def handle_message(index, message):
+    """Dispatch a single JSON-RPC request and return the response dict (None for notifications)."""
+    methods = {
+        'list': index.handle_list,
+        'tree': index.handle_tree,
+        'read': index.handle_read,
+        'search': index.handle_search,
+    }
+
+    request_id = message.get('id') if isinstance(message, dict) else None
+    try:
+        if not isinstance(message, dict) or message.get('jsonrpc') != '2.0' \
+                or not isinstance(message.get('method'), str):
+            raise RpcError(INVALID_REQUEST, "Invalid JSON-RPC 2.0 request")
+        method = methods.get(message['method'])
+        if method is None:
+            raise RpcError(METHOD_NOT_FOUND, f"Method not found: {message['method']}")
+
+        params = message.get('params', {})
+        if not isinstance(params, (list, dict)):
+            raise RpcError(INVALID_PARAMS, "'params' must be an array or object")
+
+        # Check the call against the handler signature so TypeErrors raised inside
+        # a handler are reported as internal errors, not as bad parameters
+        try:
+            if isinstance(params, list):
+                bound = inspect.signature(method).bind(*params)
+            else:
+                bound = inspect.signature(method).bind(**params)
+        except TypeError as e:
+            raise RpcError(INVALID_PARAMS, str(e))
+        result = method(*bound.args, **bound.kwargs)
+        response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+    except RpcError as e:
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+    except Exception as e:
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': INTERNAL_ERROR, 'message': str(e)}}
+
+    if isinstance(message, dict) and 'id' not in message:
+        return None
+    return response
+
+
+def handle_line(index, line):
+    """Parse one newline-delimited JSON-RPC message (or batch) and return the encoded reply."""
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': str(e)}}
+        return json.dumps(response)
+
+    if isinstance(message, list):
+        if not message:
+            response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST, 'message': "Empty batch"}}
+            return json.dumps(response)
+        responses = [r for r in (handle_message(index, m) for m in message) if r is not None]
+        return json.dumps(responses) if responses else None
+
+    response = handle_message(index, message)
+    return json.dumps(response) if response is not None else None
+
+
+def serve_stdio(index):
+    """Serve newline-delimited JSON-RPC messages on stdin/stdout."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        reply = handle_line(index, line)
+        if reply is not None:
+            sys.stdout.write(reply + '\n')
+            sys.stdout.flush()
+
+
+def serve_socket(index, host, port):
+    """Serve newline-delimited JSON-RPC messages on a local TCP socket."""
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw_line in self.rfile:
+                line = raw_line.decode('utf-8', errors='replace')
+                if not line.strip():
+                    continue
+                reply = handle_line(index, line)
+                if reply is not None:
+                    self.wfile.write((reply + '\n').encode('utf-8'))
+                    self.wfile.flush()
+
+    class Server(socketserver.ThreadingTCPServer):
+        allow_reuse_address = True
+        daemon_threads = True
+
+    with Server((host, port), Handler) as server:
+        print(f"Listening on {host}:{server.server_address[1]}", file=sys.stderr)
+        server.serve_forever()
+
+
+def main():
+    """Main function to start the codebase context server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve codebase context over JSON-RPC without generating a full dump.')
+    parser.add_argument('--include-docs', action='store_true', help='Include documentation files even if in .gitignore')
+    parser.add_argument('--port', type=int, help='Listen on a local TCP port instead of stdio')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind when using --port (default: 127.0.0.1)')
+    parser.add_argument('--cache-size', type=int, default=64,
+                      help='Maximum size of the file content cache in MB of text (default: 64)')
+    parser.add_argument('--rescan-interval', type=float, default=5.0,
+                      help='Minimum seconds between rescans of the directory tree (default: 5)')
+    args = parser.parse_args()
+
+    # Status output goes to stderr so it never corrupts the stdio protocol stream
+    start_time = time.time()
+    index = CodebaseIndex(
+        get_root_dir(),
+        respect_gitignore=not args.include_docs,
+        cache_chars=args.cache_size * 1024 * 1024,
+        rescan_interval=args.rescan_interval
+    )
+    print(f"Indexed {len(index.files)} files in {time.time() - start_time:.2f} seconds", file=sys.stderr)
+
+    try:
+        if args.port is not None:
+            serve_socket(index, args.host, args.port)
+        else:
+            serve_stdio(index)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
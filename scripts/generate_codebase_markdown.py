@@ -7,6 +7,8 @@ import datetime
 from pathspec import PathSpec
 from pathspec.patterns import GitWildMatchPattern
 
+from snapshot_index import SnapshotWriter
+
 def read_gitignore(gitignore_path):
     """Read gitignore file and return a PathSpec object."""
     if not os.path.exists(gitignore_path):
@@ -144,18 +146,20 @@ def process_codebase(output_file, root_pathspec, additional_pathspecs, respect_g
     """Process the codebase and write to markdown file."""
     root_dir = os.path.dirname(os.path.abspath(__file__)) + '/..'
     
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with open(output_file, 'w', encoding='utf-8') as snapshot_file:
+        writer = SnapshotWriter(snapshot_file)
+        
         # Write title
-        f.write("# Codebase Documentation\n\n")
+        writer.write("# Codebase Documentation\n\n")
         
         # Write directory structure
-        f.write("## Directory Structure\n\n")
+        writer.write("## Directory Structure\n\n")
         tree = generate_directory_tree(root_dir, root_pathspec, additional_pathspecs, respect_gitignore=respect_gitignore)
-        f.write('\n'.join(tree))
-        f.write('\n\n')
+        writer.write('\n'.join(tree))
+        writer.write('\n\n')
         
         # Write file contents
-        f.write("## File Contents\n\n")
+        writer.write("## File Contents\n\n")
         
         # Keep track of processed files to avoid duplicates
         processed_files = set()
@@ -171,6 +175,7 @@ def process_codebase(output_file, root_pathspec, additional_pathspecs, respect_g
                     continue
                 
                 processed_files.add(rel_path)
+                writer.begin_file(rel_path)
                 
                 if is_binary_file(file_path):
                     continue
@@ -180,18 +185,20 @@ def process_codebase(output_file, root_pathspec, additional_pathspecs, respect_g
                         content = file_content.read()
                     
                     # Write file header
-                    f.write(f"### {rel_path}\n\n")
+                    writer.write(f"### {rel_path}\n\n")
                     
                     # Write file content with appropriate syntax highlighting
                     extension = get_file_extension(file_path)
-                    f.write(f"```{extension}\n")
-                    f.write(content)
+                    writer.write(f"```{extension}\n")
+                    writer.write(content)
                     if not content.endswith('\n'):
-                        f.write('\n')
-                    f.write("```\n\n")
+                        writer.write('\n')
+                    writer.write("```\n\n")
                 except Exception as e:
-                    f.write(f"### {rel_path}\n\n")
-                    f.write(f"Error reading file: {str(e)}\n\n")
+                    writer.write(f"### {rel_path}\n\n")
+                    writer.write(f"Error reading file: {str(e)}\n\n")
+        
+        writer.write_index()
 
 def main():
     """Main function to generate the markdown file."""
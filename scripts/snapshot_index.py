@@ -0,0 +1,153 @@
+"""
+Per-file index embedded at the end of codebase snapshots.
+Each file section written to a snapshot is recorded with its hash, byte size and
+byte offset, so two snapshots can be compared index-to-index and only the sections
+whose hashes differ need to be read and line-diffed.
+"""
+import os
+import re
+import sys
+import hashlib
+import difflib
+
+INDEX_HEADING = "## File Index"
+
+# Last line of a snapshot, pointing back at the start of the index section
+INDEX_TRAILER = "<!-- snapshot-index: offset={offset} count={count} -->"
+INDEX_TRAILER_PATTERN = re.compile(r'<!-- snapshot-index: offset=(\d+) count=(\d+) -->\s*$')
+
+# How much of the end of a snapshot to read when looking for the trailer
+TRAILER_READ_SIZE = 4096
+
+class SnapshotWriter:
+    """Wrap a text file being written as a snapshot and record an index entry per file section.
+
+    Generators send every write through the writer rather than the raw file, so
+    that each section's path, hash, size and byte offset can be recorded as it is
+    written. Call begin_file() before writing a file's section; everything written
+    until the next begin_file() (or write_index()) is hashed and attributed to that
+    path. Sections that end up empty (e.g. skipped binary files) are not indexed.
+    """
+    def __init__(self, f):
+        self.f = f
+        self.index = []
+        self.current = None
+
+    def write(self, text):
+        if self.current is not None:
+            self.current['hasher'].update(text.encode('utf-8'))
+        self.f.write(text)
+
+    def begin_file(self, rel_path):
+        """Start a new file section at the current position."""
+        self.end_file()
+        self.current = {
+            'path': rel_path.replace(os.path.sep, '/'),
+            'offset': self.f.tell(),
+            'hasher': hashlib.sha1(),
+        }
+
+    def end_file(self):
+        """Close the current file section, recording it if anything was written."""
+        if self.current is None:
+            return
+        size = self.f.tell() - self.current['offset']
+        if size > 0:
+            self.index.append({
+                'path': self.current['path'],
+                'hash': self.current['hasher'].hexdigest(),
+                'size': size,
+                'offset': self.current['offset'],
+            })
+        self.current = None
+
+    def write_index(self):
+        """Append the index section and trailer. This must be the last thing written."""
+        self.end_file()
+        index_offset = self.f.tell()
+        self.f.write(f"{INDEX_HEADING}\n\n")
+        self.f.write("<!-- hash\tsize\toffset\tpath -->\n")
+        for entry in self.index:
+            self.f.write(f"{entry['hash']}\t{entry['size']}\t{entry['offset']}\t{entry['path']}\n")
+        self.f.write('\n')
+        self.f.write(INDEX_TRAILER.format(offset=index_offset, count=len(self.index)) + '\n')
+
+def read_snapshot_index(snapshot_path):
+    """Read the embedded index of a snapshot without reading the file sections.
+
+    Returns:
+        Dict mapping path to an entry dict with hash, size and offset
+
+    Raises:
+        ValueError: If the snapshot has no embedded index
+    """
+    with open(snapshot_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        f.seek(max(0, file_size - TRAILER_READ_SIZE))
+        tail = f.read().decode('utf-8', errors='replace')
+
+        match = INDEX_TRAILER_PATTERN.search(tail)
+        if not match:
+            raise ValueError(f"{snapshot_path} has no embedded file index; regenerate it to diff")
+
+        f.seek(int(match.group(1)))
+        index_text = f.read().decode('utf-8', errors='replace')
+
+    index = {}
+    for line in index_text.splitlines():
+        fields = line.rstrip('\r').split('\t', 3)
+        if len(fields) != 4 or not fields[1].isdigit():
+            continue
+        index[fields[3]] = {'hash': fields[0], 'size': int(fields[1]), 'offset': int(fields[2])}
+
+    if len(index) != int(match.group(2)):
+        raise ValueError(f"{snapshot_path} has a corrupt file index (expected {match.group(2)} entries, found {len(index)})")
+    return index
+
+def read_section(snapshot_path, entry):
+    """Read a single file section of a snapshot using its index entry."""
+    with open(snapshot_path, 'rb') as f:
+        f.seek(entry['offset'])
+        data = f.read(entry['size'])
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+def diff_snapshots(old_path, new_path, name_status=False, context_lines=3, out=None):
+    """Compare two snapshots index-to-index and line-diff only the sections that changed.
+
+    Args:
+        old_path: Path to the older snapshot
+        new_path: Path to the newer snapshot
+        name_status: Only list changed paths, without reading any sections
+        context_lines: Number of context lines in the unified diffs
+        out: Stream to write to (default: stdout)
+
+    Returns:
+        Dict with lists of 'added', 'removed' and 'modified' paths and the 'unchanged' count
+    """
+    out = out or sys.stdout
+    old_index = read_snapshot_index(old_path)
+    new_index = read_snapshot_index(new_path)
+
+    added = sorted(p for p in new_index if p not in old_index)
+    removed = sorted(p for p in old_index if p not in new_index)
+    modified = sorted(p for p in new_index if p in old_index and new_index[p]['hash'] != old_index[p]['hash'])
+    unchanged = len(new_index) - len(added) - len(modified)
+
+    changes = [('A', p) for p in added] + [('D', p) for p in removed] + [('M', p) for p in modified]
+    changes.sort(key=lambda change: change[1])
+
+    for status, path in changes:
+        if name_status:
+            out.write(f"{status}\t{path}\n")
+            continue
+
+        old_lines = read_section(old_path, old_index[path]).splitlines(keepends=True) if status != 'A' else []
+        new_lines = read_section(new_path, new_index[path]).splitlines(keepends=True) if status != 'D' else []
+        from_file = f"a/{path}" if status != 'A' else '/dev/null'
+        to_file = f"b/{path}" if status != 'D' else '/dev/null'
+        for line in difflib.unified_diff(old_lines, new_lines, from_file, to_file, n=context_lines):
+            out.write(line if line.endswith('\n') else line + '\n')
+
+    out.write(f"\n{len(modified)} modified, {len(added)} added, {len(removed)} removed, {unchanged} unchanged\n")
+    return {'added': added, 'removed': removed, 'modified': modified, 'unchanged': unchanged}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts are run directly rather than installed, so make them importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,137 @@
+import os
+import json
+
+import pytest
+
+import codebase_context_server
+from codebase_context_server import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    FILE_NOT_FOUND,
+    CodebaseIndex,
+    ContentCache,
+    handle_line,
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'app.js').write_text("const a = 1;\nconst b = 2;\nconst c = 3;\n")
+    (tmp_path / 'src' / 'util.js').write_text("export const helper = () => 'a';\n")
+    (tmp_path / 'README.md').write_text("# Project\n")
+    (tmp_path / 'package-lock.json').write_text("{}\n")
+    return tmp_path
+
+
+@pytest.fixture
+def index(project):
+    return CodebaseIndex(str(project), rescan_interval=0)
+
+
+def call(index, method, params=None, request_id=1):
+    message = {'jsonrpc': '2.0', 'id': request_id, 'method': method}
+    if params is not None:
+        message['params'] = params
+    return json.loads(handle_line(index, json.dumps(message)))
+
+
+def test_list_applies_skip_lists(index):
+    paths = [entry['path'] for entry in call(index, 'list')['result']]
+    assert paths == ['README.md', 'src/app.js', 'src/util.js']
+
+
+def test_tree_matches_dump_format(index):
+    tree = call(index, 'tree', {'prefix': 'src'})['result']
+    assert tree.splitlines() == ['- [DIR] **src/**', '  - [FILE] app.js', '  - [FILE] util.js']
+
+
+def test_read_line_range(index):
+    result = call(index, 'read', ['src/app.js', 2, 3])['result']
+    assert result['content'] == "const b = 2;\nconst c = 3;\n"
+    assert result['total_lines'] == 3
+
+
+def test_search_respects_max_results(index):
+    results = call(index, 'search', {'query': 'const', 'max_results': 2})['result']
+    assert [(r['path'], r['line']) for r in results] == [('src/app.js', 1), ('src/app.js', 2)]
+
+
+@pytest.mark.parametrize('method, params', [
+    ('read', {'path': 'src/app.js', 'start_line': 'x'}),
+    ('read', {'bogus': 1}),
+    ('read', {'path': 'src/app.js', 'start_line': 5, 'end_line': 2}),
+    ('list', {'prefix': 5}),
+    ('search', {'query': 'const', 'max_results': 0}),
+    ('search', {'query': '(', 'regex': True}),
+    ('search', {'query': 'const', 'regex': 'yes'}),
+    ('tree', 'not-params'),
+])
+def test_bad_params_are_invalid_params(index, method, params):
+    assert call(index, method, params)['error']['code'] == INVALID_PARAMS
+
+
+def test_handler_type_errors_are_internal_errors(index, monkeypatch):
+    def broken(path):
+        raise TypeError("bug inside handler")
+    monkeypatch.setattr(index, 'handle_read', broken)
+    assert call(index, 'read', {'path': 'src/app.js'})['error']['code'] == INTERNAL_ERROR
+
+
+def test_protocol_errors(index):
+    assert call(index, 'nope')['error']['code'] == METHOD_NOT_FOUND
+    assert call(index, 'read', {'path': 'missing.js'})['error']['code'] == FILE_NOT_FOUND
+    assert json.loads(handle_line(index, '[]'))['error']['code'] == INVALID_REQUEST
+    assert call(index, ['x'])['error']['code'] == INVALID_REQUEST
+    assert handle_line(index, json.dumps({'jsonrpc': '2.0', 'method': 'list'})) is None
+
+
+def test_read_picks_up_mtime_changes(index, project):
+    assert call(index, 'read', {'path': 'README.md'})['result']['content'] == "# Project\n"
+    readme = project / 'README.md'
+    readme.write_text("# Renamed\n")
+    stat = os.stat(readme)
+    os.utime(readme, (stat.st_atime, stat.st_mtime + 10))
+    assert call(index, 'read', {'path': 'README.md'})['result']['content'] == "# Renamed\n"
+
+
+def test_read_finds_files_created_after_startup(project):
+    index = CodebaseIndex(str(project), rescan_interval=3600)
+    (project / 'src' / 'new.js').write_text("export const fresh = true;\n")
+    assert call(index, 'read', {'path': 'src/new.js'})['result']['content'] == "export const fresh = true;\n"
+    # Files the snapshot would skip are still not served
+    (project / 'yarn.lock').write_text("# lock\n")
+    assert call(index, 'read', {'path': 'yarn.lock'})['error']['code'] == FILE_NOT_FOUND
+
+
+def test_size_limits_match_the_snapshot(index, project, monkeypatch):
+    monkeypatch.setattr(codebase_context_server, 'MAX_READABLE_SIZE', 10)
+    monkeypatch.setattr(codebase_context_server, 'ALWAYS_SKIP_SIZE', 40)
+    (project / 'huge.log.txt').write_text("x" * 50)
+    index.rescan()
+    assert 'huge.log.txt' not in [entry['path'] for entry in call(index, 'list')['result']]
+
+    result = call(index, 'read', {'path': 'src/app.js'})['result']
+    assert result['truncated']
+    assert result['content'] == "const a = \n\n... [content truncated] ...\n\n"
+    assert call(index, 'search', {'query': 'const c'})['result'] == []
+
+
+def test_content_cache_evicts_least_recently_used():
+    cache = ContentCache(max_chars=10)
+    cache.put('a', 1, 'aaaa')
+    cache.put('b', 1, 'bbbb')
+    assert cache.get('a', 1) == 'aaaa'
+    cache.put('c', 1, 'cccc')
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == 'aaaa'
+    assert cache.total_chars == 8
+
+
+def test_content_cache_drops_stale_entries():
+    cache = ContentCache(max_chars=10)
+    cache.put('a', 1, 'aaaa')
+    assert cache.get('a', 2) is None
+    assert cache.total_chars == 0
@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+from snapshot_index import SnapshotWriter, diff_snapshots, read_section, read_snapshot_index
+
+
+def write_snapshot(path, files):
+    with open(path, 'w', encoding='utf-8') as snapshot_file:
+        writer = SnapshotWriter(snapshot_file)
+        writer.write("# Codebase Documentation\n\n## File Contents\n\n")
+        for rel_path, content in files.items():
+            writer.begin_file(rel_path)
+            if content is not None:
+                writer.write(f"### {rel_path}\n\n```\n{content}```\n\n")
+        writer.write_index()
+
+
+def test_index_round_trip(tmp_path):
+    snapshot = tmp_path / 'snapshot.txt'
+    write_snapshot(snapshot, {'a.js': "const a = 1;\n", 'binary.png': None, 'dir/b.md': "# B\n"})
+
+    index = read_snapshot_index(snapshot)
+    assert sorted(index) == ['a.js', 'dir/b.md']
+    assert read_section(snapshot, index['dir/b.md']) == "### dir/b.md\n\n```\n# B\n```\n\n"
+
+
+def test_identical_content_has_identical_hashes(tmp_path):
+    write_snapshot(tmp_path / 'old.txt', {'a.js': "x\n", 'b.js': "y\n"})
+    write_snapshot(tmp_path / 'new.txt', {'b.js': "y\n", 'a.js': "x\n"})
+    old_index = read_snapshot_index(tmp_path / 'old.txt')
+    new_index = read_snapshot_index(tmp_path / 'new.txt')
+    assert {p: e['hash'] for p, e in old_index.items()} == {p: e['hash'] for p, e in new_index.items()}
+
+
+def test_diff_reports_added_removed_and_modified(tmp_path):
+    write_snapshot(tmp_path / 'old.txt', {'kept.js': "same\n", 'changed.js': "one\ntwo\n", 'removed.js': "gone\n"})
+    write_snapshot(tmp_path / 'new.txt', {'kept.js': "same\n", 'changed.js': "one\nthree\n", 'added.js': "new\n"})
+
+    out = io.StringIO()
+    result = diff_snapshots(tmp_path / 'old.txt', tmp_path / 'new.txt', name_status=True, out=out)
+    assert result == {'added': ['added.js'], 'removed': ['removed.js'], 'modified': ['changed.js'], 'unchanged': 1}
+    assert out.getvalue().splitlines()[:3] == ['A\tadded.js', 'M\tchanged.js', 'D\tremoved.js']
+
+    out = io.StringIO()
+    diff_snapshots(tmp_path / 'old.txt', tmp_path / 'new.txt', out=out)
+    diff_text = out.getvalue()
+    assert "-two\n+three\n" in diff_text
+    assert "--- /dev/null\n+++ b/added.js\n" in diff_text
+    assert "--- a/removed.js\n+++ /dev/null\n" in diff_text
+    assert "kept.js" not in diff_text
+
+
+def test_snapshot_without_index_is_rejected(tmp_path):
+    legacy = tmp_path / 'legacy.txt'
+    legacy.write_text("# Codebase Documentation\n\n### a.js\n")
+    with pytest.raises(ValueError, match="no embedded file index"):
+        read_snapshot_index(legacy)
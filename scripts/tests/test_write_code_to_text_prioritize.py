@@ -0,0 +1,127 @@
+import os
+import itertools
+import subprocess
+
+import pytest
+
+from snapshot_index import SnapshotWriter, read_snapshot_index
+from write_code_to_text import (
+    DEFAULT_PRIORITY_RULES,
+    file_priority,
+    load_gitignore_pathspecs,
+    load_recent_git_activity,
+    parse_priority_rule,
+    process_codebase,
+    process_revision,
+    snapshot_result,
+    write_file_contents,
+)
+
+# Years before any plausible test run
+OLD_DATE = '2020-01-15T12:00:00+00:00'
+
+
+def git(repo, *args, env=None):
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True,
+                          env=env).stdout.strip()
+
+
+def commit_at(repo, date, message):
+    env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', message, env=env)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / 'repo'
+    (repo / 'frontend' / 'src').mkdir(parents=True)
+    (repo / 'backend').mkdir()
+    (repo / 'frontend' / 'src' / 'App.js').write_text("export default function App() {}\n")
+    (repo / 'backend' / 'server.js').write_text("app.listen(3000);\n")
+    (repo / 'README.md').write_text("# Repo\n")
+
+    git(repo, 'init', '-q')
+    git(repo, 'config', 'user.email', 'dev@example.com')
+    git(repo, 'config', 'user.name', 'Dev')
+    commit_at(repo, OLD_DATE, 'initial')
+    return repo
+
+
+def test_parse_priority_rule():
+    assert parse_priority_rule('src/*.js=2.5') == ('src/*.js', 2.5)
+    assert parse_priority_rule('a=b=0.5') == ('a=b', 0.5)
+    with pytest.raises(ValueError):
+        parse_priority_rule('=2')
+    with pytest.raises(ValueError):
+        parse_priority_rule('src/*.js=high')
+
+
+def test_file_priority_prefers_weighted_small_and_active_files():
+    rules = DEFAULT_PRIORITY_RULES
+    assert file_priority('frontend/src/App.js', 1024, rules, {}) > file_priority('backend/server.js', 1024, rules, {})
+    assert file_priority('backend/server.js', 1024, rules, {}) > file_priority('backend/server.js', 1024 * 1024, rules, {})
+    assert file_priority('backend/server.js', 1024, rules, {'backend/server.js': 3}) > file_priority('backend/server.js', 1024, rules, {})
+    # The first matching rule wins
+    assert file_priority('frontend/src/App.bak', 0, rules, {}) == pytest.approx(0.1)
+    assert file_priority('docs/notes.txt', 0, [('docs/*', 0.5), ('*.txt', 4.0)], {}) == pytest.approx(0.5)
+
+
+def test_recent_activity_window_ends_at_the_revision_date(repo):
+    # The only commit is years old, so it is outside a window ending now...
+    assert load_recent_git_activity(str(repo), days=30) == {}
+    # ...but inside one ending at the commit itself
+    activity = load_recent_git_activity(str(repo), days=30, rev='HEAD')
+    assert activity == {'README.md': 1, 'backend/server.js': 1, 'frontend/src/App.js': 1}
+
+
+def test_recent_activity_skips_git_when_out_of_time(repo):
+    assert load_recent_git_activity(str(repo), days=30, rev='HEAD', end_time_limit=0) == {}
+
+
+def test_prioritized_worktree_timeout_lists_every_file_as_omitted(repo, tmp_path):
+    output = tmp_path / 'snapshot.txt'
+    root_pathspec, additional_pathspecs = load_gitignore_pathspecs(str(repo))
+    success, message = process_codebase(str(output), root_pathspec, additional_pathspecs, timeout_seconds=0,
+                                        prioritize=True, root_dir=str(repo))
+    assert success, message
+
+    text = output.read_text()
+    assert "## Directory Structure" in text
+    assert "## Omitted Files" in text
+    for rel_path in ('frontend/src/App.js', 'backend/server.js', 'README.md'):
+        assert f"- {rel_path}\n" in text
+    assert read_snapshot_index(output) == {}
+
+
+def test_prioritized_revision_timeout_lists_files_in_priority_order(repo, tmp_path):
+    output = tmp_path / 'snapshot.txt'
+    success, message = process_revision(str(output), 'HEAD', timeout_seconds=0, prioritize=True, root_dir=str(repo))
+    assert success, message
+
+    omitted = output.read_text().split("## Omitted Files")[1]
+    assert omitted.index('frontend/src/App.js') < omitted.index('backend/server.js')
+    assert read_snapshot_index(output) == {}
+
+
+def test_timeout_without_prioritize_still_fails(repo, tmp_path):
+    root_pathspec, additional_pathspecs = load_gitignore_pathspecs(str(repo))
+    success, _ = process_codebase(str(tmp_path / 'snapshot.txt'), root_pathspec, additional_pathspecs,
+                                  timeout_seconds=0, root_dir=str(repo))
+    assert not success
+
+
+def test_deadline_passing_between_clock_reads_still_omits(tmp_path, monkeypatch):
+    # Each read of the clock moves it 0.2s forward. The loop's start time takes the first
+    # tick, so the deadline passes during the first file's iteration
+    ticks = itertools.count(999.7, 0.2)
+    monkeypatch.setattr('time.time', lambda: next(ticks))
+    candidates = [(name, 10, lambda max_chars: "text\n") for name in ('a.js', 'b.js')]
+
+    with open(tmp_path / 'snapshot.txt', 'w', encoding='utf-8') as f:
+        stats = write_file_contents(SnapshotWriter(f), candidates, 1000, prioritize=True)
+
+    assert not stats['timed_out']
+    assert stats['file_count'] == 1
+    assert stats['omitted_files'] == ['b.js']
+    assert snapshot_result(stats, 0, 1)[0]
@@ -0,0 +1,88 @@
+import subprocess
+
+import pytest
+
+from snapshot_index import read_section, read_snapshot_index
+from write_code_to_text import (
+    GitBlobReader,
+    list_revision_files,
+    load_gitignore_pathspecs,
+    process_codebase,
+    process_revision,
+)
+
+
+def git(repo, *args):
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / 'repo'
+    (repo / 'frontend' / 'src').mkdir(parents=True)
+    (repo / 'backend').mkdir()
+    (repo / '.gitignore').write_text("*.secret\n")
+    (repo / 'frontend' / '.gitignore').write_text("generated/\n")
+    (repo / 'frontend' / 'src' / 'App.js').write_text("export default function App() {}\n")
+    (repo / 'backend' / 'server.js').write_text("const express = require('express');\r\napp.listen(3000);\r\n")
+    (repo / 'backend' / 'package.json').write_text("{}\n")
+    (repo / 'README.md').write_text("# Repo\n")
+    (repo / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n\x00\xff')
+
+    git(repo, 'init', '-q')
+    git(repo, 'config', 'user.email', 'dev@example.com')
+    git(repo, 'config', 'user.name', 'Dev')
+    git(repo, 'add', '.')
+    # Tracked despite the ignore rule, so only the revision's .gitignore can exclude it
+    (repo / 'keys.secret').write_text("hunter2\n")
+    git(repo, 'add', '-f', 'keys.secret')
+    git(repo, 'commit', '-q', '-m', 'initial')
+    return repo
+
+
+def snapshot_sections(path):
+    index = read_snapshot_index(path)
+    return {rel_path: read_section(path, entry) for rel_path, entry in index.items()}
+
+
+def test_revision_snapshot_matches_worktree_snapshot(repo, tmp_path):
+    root_pathspec, additional_pathspecs = load_gitignore_pathspecs(str(repo))
+    success, message = process_codebase(str(tmp_path / 'worktree.txt'), root_pathspec, additional_pathspecs,
+                                        root_dir=str(repo))
+    assert success, message
+    success, message = process_revision(str(tmp_path / 'rev.txt'), 'HEAD', root_dir=str(repo))
+    assert success, message
+
+    worktree = snapshot_sections(tmp_path / 'worktree.txt')
+    revision = snapshot_sections(tmp_path / 'rev.txt')
+    assert sorted(revision) == ['.gitignore', 'README.md', 'backend/server.js', 'frontend/.gitignore', 'frontend/src/App.js']
+    assert revision == worktree
+
+
+def test_revision_snapshot_never_reads_the_worktree(repo, tmp_path):
+    first_commit = git(repo, 'rev-parse', 'HEAD')
+    (repo / 'README.md').write_text("# Changed in worktree\n")
+    (repo / 'frontend' / 'src' / 'App.js').unlink()
+
+    success, message = process_revision(str(tmp_path / 'rev.txt'), first_commit, root_dir=str(repo))
+    assert success, message
+
+    sections = snapshot_sections(tmp_path / 'rev.txt')
+    assert "# Repo\n" in sections['README.md']
+    assert 'frontend/src/App.js' in sections
+
+
+def test_unknown_revision_fails(repo, tmp_path):
+    success, message = process_revision(str(tmp_path / 'rev.txt'), 'no-such-branch', root_dir=str(repo))
+    assert not success
+    assert "Unknown git revision" in message
+
+
+def test_blob_reader_streams_many_blobs_through_one_process(repo):
+    files = {rel_path: sha for rel_path, sha, size in list_revision_files(str(repo), 'HEAD')}
+    with GitBlobReader(str(repo)) as reader:
+        assert reader.read(files['README.md']) == b"# Repo\n"
+        assert reader.read(files['logo.png']) == b'\x89PNG\r\n\x1a\n\x00\xff'
+        assert reader.read(files['README.md']) == b"# Repo\n"
+        with pytest.raises(KeyError):
+            reader.read('0' * 40)
@@ -121,6 +121,32 @@ if "%~3"=="-max-file-size" (
     )
 )
 
+if "%~1"=="-rev" (
+    set ARGS=%ARGS% --rev %~2
+    echo Will snapshot git revision %~2
+)
+if "%~3"=="-rev" (
+    set ARGS=%ARGS% --rev %~4
+    echo Will snapshot git revision %~4
+)
+
+if "%~1"=="-prioritize" (
+    set ARGS=%ARGS% --prioritize
+    echo Will read files in priority order and list any omitted at the timeout
+)
+if "%~2"=="-prioritize" (
+    set ARGS=%ARGS% --prioritize
+    echo Will read files in priority order and list any omitted at the timeout
+)
+if "%~3"=="-prioritize" (
+    set ARGS=%ARGS% --prioritize
+    echo Will read files in priority order and list any omitted at the timeout
+)
+if "%~4"=="-prioritize" (
+    set ARGS=%ARGS% --prioritize
+    echo Will read files in priority order and list any omitted at the timeout
+)
+
 echo Installing required dependencies...
 pip install pathspec
 
@@ -145,6 +171,8 @@ if not "%ARGS%"=="--include-docs" if not "%ARGS:~-13%"==" --include-docs" (
     echo Note: To include documentation files that are listed in .gitignore, run this script with the -include-docs parameter
 )
 echo Example: write_code_to_text.bat -commit -include-docs -output-file codebase.txt -no-timestamp -timeout 300 -skip-large-files -max-file-size 2097152
+echo Example: write_code_to_text.bat -rev v1.0.0 -no-timestamp
+echo Example: write_code_to_text.bat -timeout 30 -prioritize
 
 pause
 endlocal
\ No newline at end of file
@@ -5,7 +5,9 @@ param(
     [switch]$noTimestamp = $false,
     [int]$timeout = 120,
     [switch]$skipLargeFiles = $false,
-    [int]$maxFileSize = 1048576 # Default 1MB
+    [int]$maxFileSize = 1048576, # Default 1MB
+    [string]$rev = "",
+    [switch]$prioritize = $false
 )
 
 Write-Host "Installing required dependencies..." -ForegroundColor Green
@@ -46,6 +48,15 @@ if ($skipLargeFiles -and $maxFileSize -ne 1048576) {
     $argList += "$maxFileSize"
     Write-Host "Max file size set to $($maxFileSize/1KB) KB" -ForegroundColor Yellow
 }
+if ($rev -ne "") {
+    $argList += "--rev"
+    $argList += "$rev"
+    Write-Host "Will snapshot git revision $rev" -ForegroundColor Yellow
+}
+if ($prioritize) {
+    $argList += "--prioritize"
+    Write-Host "Will read the most valuable files first and list omitted files on timeout" -ForegroundColor Yellow
+}
 
 # Run the Python script with appropriate arguments
 Write-Host "Running with timeout of $timeout seconds" -ForegroundColor Cyan
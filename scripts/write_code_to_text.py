@@ -6,12 +6,15 @@ unless specifically overridden with the --include-docs flag.
 """
 import os
 import fnmatch
+import functools
 import pathlib
 import re
 import datetime
 from pathspec import PathSpec
 from pathspec.patterns import GitWildMatchPattern
 
+from snapshot_index import SnapshotWriter, diff_snapshots
+
 def read_gitignore(gitignore_path):
     """Read gitignore file and return a PathSpec object."""
     if not os.path.exists(gitignore_path):
@@ -31,7 +34,7 @@ def is_binary_file(file_path):
     except UnicodeDecodeError:
         return True
 
-def should_ignore(path, root_pathspec, additional_pathspecs, respect_gitignore=True):
+def should_ignore(path, root_pathspec, additional_pathspecs, respect_gitignore=True, root_dir=None):
     """Check if a path should be ignored based on gitignore rules.
     
     Args:
@@ -39,9 +42,10 @@ def should_ignore(path, root_pathspec, additional_pathspecs, respect_gitignore=T
         root_pathspec: Root .gitignore PathSpec
         additional_pathspecs: Additional .gitignore PathSpecs
         respect_gitignore: Whether to respect gitignore rules
+        root_dir: Project root the gitignore rules are relative to (default: get_root_dir())
     """
     # Convert to relative path from the root of the project
-    rel_path = os.path.relpath(path, start=os.path.dirname(os.path.abspath(__file__)) + '/..')
+    rel_path = os.path.relpath(path, start=root_dir or get_root_dir())
     
     if respect_gitignore:
         # Check root gitignore
@@ -119,7 +123,124 @@ def get_file_extension(file_path):
     
     return extension_map.get(ext, '')
 
-def generate_directory_tree(start_path, root_pathspec, additional_pathspecs, indent='', respect_gitignore=True):
+# Directories that are never descended into
+ALWAYS_SKIP_DIRS = [
+    'node_modules',
+    '.git',
+    'build',
+    'dist',
+    '__pycache__',
+    '.cache',
+]
+
+# Specific files to always skip
+ALWAYS_SKIP_FILES = [
+    'package-lock.json',
+    'package.json',
+    'codebase_documentation.txt',
+    'codebase_documentation_*.txt',  # Pattern for timestamp versions
+    '*.lock',
+    '*.env',
+    '*.min.js',
+    '*.min.css',
+    '*.map',
+    '*.woff',
+    '*.woff2',
+    '*.ttf',
+    '*.eot',
+    'yarn.lock',
+    'npm-shrinkwrap.json',
+    'composer.lock',
+    'Gemfile.lock',
+    'Cargo.lock',
+    'poetry.lock',
+]
+
+# Extensions of files that are likely problematic (binary, logs, archives)
+SKIP_EXTENSIONS = [
+    '.log', '.lock', '.bin', '.exe', '.dll', '.o', '.obj',
+    '.pyc', '.pyo', '.so', '.dylib', '.zip', '.tar', '.gz',
+    '.7z', '.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg',
+]
+
+def write_file_section(f, rel_path, content):
+    """Write a file header followed by its content in a fenced code block."""
+    # Write file header
+    f.write(f"### {rel_path}\n\n")
+    
+    # Write file content with appropriate syntax highlighting
+    extension = get_file_extension(rel_path)
+    f.write(f"```{extension}\n")
+    f.write(content)
+    if not content.endswith('\n'):
+        f.write('\n')
+    f.write("```\n\n")
+
+def get_root_dir():
+    """Get the project root directory (the parent of the scripts directory)."""
+    return os.path.dirname(os.path.abspath(__file__)) + '/..'
+
+def load_gitignore_pathspecs(root_dir):
+    """Read the root .gitignore and all nested .gitignore files.
+    
+    Returns:
+        Tuple of (root_pathspec, additional_pathspecs) where additional_pathspecs
+        maps a directory relative to root_dir to its PathSpec
+    """
+    root_pathspec = read_gitignore(os.path.join(root_dir, '.gitignore'))
+    
+    additional_pathspecs = {}
+    for root, dirs, files in os.walk(root_dir):
+        # Skip node_modules entirely to save time
+        if 'node_modules' in dirs:
+            dirs.remove('node_modules')
+            
+        if '.gitignore' in files and os.path.abspath(root) != os.path.abspath(root_dir):
+            rel_dir = os.path.relpath(root, start=root_dir)
+            additional_pathspecs[rel_dir] = read_gitignore(os.path.join(root, '.gitignore'))
+    
+    return root_pathspec, additional_pathspecs
+
+def is_skipped_file(file_name):
+    """Check if a file name matches the always-skip lists or a problematic extension."""
+    # Skip our own documentation files - prevent circular inclusion
+    if file_name.startswith('codebase_documentation') and file_name.endswith('.txt'):
+        return True
+    
+    for skip_pattern in ALWAYS_SKIP_FILES:
+        if fnmatch.fnmatch(file_name, skip_pattern):
+            return True
+    
+    return os.path.splitext(file_name)[1].lower() in SKIP_EXTENSIONS
+
+def scan_codebase(root_dir, root_pathspec, additional_pathspecs, respect_gitignore=True):
+    """Walk the codebase and yield the files that belong in a snapshot.
+    
+    This is the metadata-only part of the scan: no file contents are read.
+    
+    Args:
+        root_dir: Project root directory
+        root_pathspec: Root .gitignore PathSpec
+        additional_pathspecs: Additional .gitignore PathSpecs
+        respect_gitignore: Whether to respect gitignore rules
+    
+    Yields:
+        Tuples of (rel_path, file_path) in walk order
+    """
+    for root, dirs, files in os.walk(root_dir):
+        # Remove problem directories from the dirs list so they won't be visited
+        dirs[:] = sorted(d for d in dirs if d not in ALWAYS_SKIP_DIRS)
+        
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            
+            if is_skipped_file(file) or should_ignore(file_path, root_pathspec, additional_pathspecs, respect_gitignore, root_dir):
+                continue
+            
+            yield os.path.relpath(file_path, start=root_dir), file_path
+
+def generate_directory_tree(start_path, root_pathspec, additional_pathspecs, indent='', respect_gitignore=True,
+                            root_dir=None):
     """Generate a markdown representation of the directory tree."""
     tree = []
     
@@ -131,22 +252,289 @@ def generate_directory_tree(start_path, root_pathspec, additional_pathspecs, ind
     
     for item in items:
         item_path = os.path.join(start_path, item)
-        rel_path = os.path.relpath(item_path, start=os.path.dirname(os.path.abspath(__file__)) + '/..')
         
-        if should_ignore(item_path, root_pathspec, additional_pathspecs, respect_gitignore):
+        if should_ignore(item_path, root_pathspec, additional_pathspecs, respect_gitignore, root_dir):
             continue
         
         if os.path.isdir(item_path):
             tree.append(f"{indent}- [DIR] **{item}/**")
-            subtree = generate_directory_tree(item_path, root_pathspec, additional_pathspecs, indent + '  ', respect_gitignore)
+            subtree = generate_directory_tree(item_path, root_pathspec, additional_pathspecs, indent + '  ', respect_gitignore,
+                                              root_dir)
             tree.extend(subtree)
         else:
             tree.append(f"{indent}- [FILE] {item}")
     
     return tree
 
+def generate_tree_from_paths(rel_paths, indent=''):
+    """Generate the same markdown directory tree as generate_directory_tree from a list of
+    '/'-separated relative file paths, without touching the filesystem."""
+    tree = []
+    seen_dirs = set()
+    
+    # Sorting on path components matches the per-directory sorted listing
+    for rel_path in sorted(rel_paths, key=lambda p: p.split('/')):
+        parts = rel_path.split('/')
+        for depth, name in enumerate(parts[:-1]):
+            dir_key = '/'.join(parts[:depth + 1])
+            if dir_key not in seen_dirs:
+                seen_dirs.add(dir_key)
+                tree.append(f"{indent}{'  ' * depth}- [DIR] **{name}/**")
+        tree.append(f"{indent}{'  ' * (len(parts) - 1)}- [FILE] {parts[-1]}")
+    
+    return tree
+
+# Default path rules for --prioritize, as (fnmatch pattern, weight). The first
+# matching rule wins; unmatched files get weight 1.0. Rules given on the command
+# line are checked before these.
+DEFAULT_PRIORITY_RULES = [
+    ('*.bak', 0.1),
+    ('*/__tests__/*', 1.0),
+    ('*.test.js', 1.0),
+    ('*/__mocks__/*', 0.5),
+    ('frontend/src/*', 3.0),
+    ('backend/migrations/*', 0.5),
+    ('backend/seeders/*', 0.3),
+    ('backend/*', 2.5),
+    ('scripts/*', 1.5),
+    ('*README.md', 1.5),
+    ('test-utils/test-results/*', 0.1),
+    ('Documentation/*', 0.5),
+    ('*.json', 0.5),
+]
+
+# Files touched by recent commits get up to this much extra weight (1.0 doubles it)
+RECENT_ACTIVITY_BOOST = 1.0
+RECENT_ACTIVITY_MAX_COMMITS = 10
+
+# Upper bound in seconds on the git calls that load recent activity
+GIT_ACTIVITY_TIMEOUT = 10
+
+# Reading cost grows by one unit per this many bytes of file size
+PRIORITY_COST_UNIT = 16 * 1024
+
+def parse_priority_rule(rule):
+    """Parse a PATTERN=WEIGHT command line rule into a (pattern, weight) tuple."""
+    pattern, _, weight = rule.rpartition('=')
+    if not pattern:
+        raise ValueError(f"Priority rule must look like PATTERN=WEIGHT: {rule}")
+    return (pattern, float(weight))
+
+def load_recent_git_activity(root_dir, days=30, rev=None, end_time_limit=None):
+    """Count how many commits in a `days`-day window touched each file.
+    
+    For the worktree (rev=None) the window ends now. For a revision it ends at that
+    commit's own date, so a snapshot of an old tag still sees its recent history.
+    The git calls are bounded by end_time_limit, and nothing is loaded once it has passed.
+    
+    Returns:
+        Dict mapping '/'-separated relative path to commit count (empty if git is unavailable)
+    """
+    import time
+    import subprocess
+    from collections import Counter
+    
+    timeout_seconds = GIT_ACTIVITY_TIMEOUT
+    if end_time_limit is not None:
+        timeout_seconds = min(timeout_seconds, end_time_limit - time.time())
+    if timeout_seconds <= 0:
+        return {}
+    
+    try:
+        if rev is None:
+            log_rev, since = 'HEAD', f"{days} days ago"
+        else:
+            commit_time = int(subprocess.run(
+                ['git', 'show', '-s', '--format=%ct', rev],
+                cwd=root_dir, capture_output=True, text=True, timeout=timeout_seconds, check=True
+            ).stdout.strip())
+            log_rev, since = rev, f"@{commit_time - days * 24 * 60 * 60}"
+        
+        output = subprocess.run(
+            ['git', 'log', log_rev, f"--since={since}", '--name-only', '--format='],
+            cwd=root_dir, capture_output=True, text=True, timeout=timeout_seconds
+        ).stdout
+    except Exception:
+        return {}
+    
+    return Counter(line for line in output.splitlines() if line)
+
+def file_priority(rel_path, file_size, priority_rules, recent_activity):
+    """Score a file for --prioritize scheduling: value (path rule weight boosted by
+    recent git activity) divided by reading cost (size). Higher is read first."""
+    rel_path = rel_path.replace(os.path.sep, '/')
+    
+    weight = 1.0
+    for pattern, rule_weight in priority_rules:
+        if fnmatch.fnmatch(rel_path, pattern):
+            weight = rule_weight
+            break
+    
+    commits = min(recent_activity.get(rel_path, 0), RECENT_ACTIVITY_MAX_COMMITS)
+    value = weight * (1 + RECENT_ACTIVITY_BOOST * commits / RECENT_ACTIVITY_MAX_COMMITS)
+    cost = 1 + file_size / PRIORITY_COST_UNIT
+    return value / cost
+
+def write_omitted_section(f, omitted_files):
+    """List the files a prioritized run ran out of time for, in priority order."""
+    f.write("## Omitted Files\n\n")
+    f.write(f"The time budget ran out before these {len(omitted_files)} files were read (highest priority first):\n\n")
+    for rel_path in omitted_files:
+        f.write(f"- {rel_path}\n")
+    f.write('\n')
+
+# Files larger than this are always skipped
+ALWAYS_SKIP_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Files larger than this are truncated in the snapshot
+MAX_READABLE_SIZE = 1 * 1024 * 1024  # 1MB
+
+def read_worktree_file(file_path, max_chars):
+    """Read up to max_chars characters of a worktree file, or return None if it is binary."""
+    if is_binary_file(file_path):
+        return None
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file_content:
+        return file_content.read(max_chars)
+
+def write_file_contents(writer, candidates, end_time_limit, skip_large_files=False, max_file_size=1024*1024,
+                        prioritize=False, priority_rules=None, recent_activity=None):
+    """Write a section for each candidate file. Shared by worktree and revision snapshots,
+    which differ only in where the candidates come from.
+    
+    Args:
+        writer: SnapshotWriter for the output file
+        candidates: List of (rel_path, size, read_content) tuples in output order, where
+            read_content(max_chars) returns the file text or None for binary files
+        end_time_limit: time.time() value at which the time budget runs out
+        skip_large_files: Whether to skip files larger than max_file_size
+        max_file_size: Maximum file size in bytes (default 1MB)
+        prioritize: Read files in priority order and, when the time budget runs out,
+            list the remaining files as omitted instead of timing out
+        priority_rules: (pattern, weight) rules for prioritize (default: DEFAULT_PRIORITY_RULES)
+        recent_activity: Commit counts per path from load_recent_git_activity
+    
+    Returns:
+        Dict with file_count, processed_size, large_file_count, skipped_size,
+        largest_files, omitted_files and timed_out
+    """
+    import time
+    
+    stats = {
+        'file_count': 0,
+        'processed_size': 0,
+        'large_file_count': 0,
+        'skipped_size': 0,
+        'largest_files': [],
+        'omitted_files': [],
+        'timed_out': False,
+    }
+    
+    if prioritize:
+        # Metadata is already known, so reorder before reading any content
+        print("Scheduling files by priority...")
+        rules = priority_rules if priority_rules is not None else DEFAULT_PRIORITY_RULES
+        recent_activity = recent_activity or {}
+        candidates = sorted(candidates, key=lambda c: (-file_priority(c[0], c[1], rules, recent_activity), c[0]))
+    
+    print("Beginning file processing...")
+    start_time = time.time()
+    progress_interval = 50  # Show progress every 50 files
+    check_timeout_interval = 20  # Check for timeout every 20 files
+    
+    for position, (rel_path, file_size, read_content) in enumerate(candidates):
+        now = time.time()
+        
+        # Under a deadline, stop reading and record what is left
+        if prioritize and now > end_time_limit:
+            stats['omitted_files'] = [c[0] for c in candidates[position:]]
+            break
+        
+        # Check for timeout every few files
+        if not prioritize and stats['file_count'] % check_timeout_interval == 0 and now > end_time_limit:
+            stats['timed_out'] = True
+            break
+        
+        writer.begin_file(rel_path)
+        
+        # Track large files for debugging
+        if file_size > 100 * 1024:  # Larger than 100KB
+            stats['largest_files'].append((rel_path, file_size))
+            stats['largest_files'].sort(key=lambda x: x[1], reverse=True)
+            del stats['largest_files'][10:]
+        
+        # Handle large files without reading their content
+        if file_size > max_file_size:
+            stats['large_file_count'] += 1
+            stats['skipped_size'] += file_size
+            
+            # Always skip extremely large files
+            if file_size > ALWAYS_SKIP_SIZE:
+                continue
+                
+            if skip_large_files:
+                writer.write(f"### {rel_path}\n\n")
+                writer.write(f"File skipped (too large): {file_size/1024:.1f} KB\n\n")
+                continue
+        
+        stats['file_count'] += 1
+        
+        # Show progress
+        if stats['file_count'] % progress_interval == 0:
+            elapsed = time.time() - start_time
+            remaining = end_time_limit - time.time()
+            print(f"Processed {stats['file_count']} files ({stats['processed_size']/1024:.1f} KB) in {elapsed:.1f} seconds... (timeout in {remaining:.1f}s)")
+        
+        try:
+            content = read_content(MAX_READABLE_SIZE)
+            if content is None:
+                continue
+            
+            if file_size > MAX_READABLE_SIZE:
+                writer.write(f"### {rel_path}\n\n")
+                writer.write(f"File content truncated (too large to display in full): {file_size/1024:.1f} KB\n\n")
+                content += "\n\n... [content truncated] ...\n\n"
+            
+            stats['processed_size'] += len(content)
+            write_file_section(writer, rel_path, content)
+        except Exception as e:
+            writer.write(f"### {rel_path}\n\n")
+            writer.write(f"Error reading file: {str(e)}\n\n")
+    
+    writer.end_file()
+    if stats['omitted_files']:
+        write_omitted_section(writer, stats['omitted_files'])
+    
+    return stats
+
+def snapshot_result(stats, start_time, timeout_seconds, source=''):
+    """Build the (success, message) result of a snapshot run from write_file_contents stats."""
+    import time
+    
+    file_count = stats['file_count']
+    processed_size = stats['processed_size']
+    if stats['timed_out']:
+        return (False, f"Processing timed out after {timeout_seconds} seconds. Processed {file_count} files ({processed_size/1024:.1f} KB) so far.")
+    
+    total_time = time.time() - start_time
+    
+    # Add stats about large files if relevant
+    large_files_info = ""
+    if stats['large_file_count'] > 0:
+        large_files_info = f" (skipped {stats['large_file_count']} large files totaling {stats['skipped_size']/1024/1024:.1f} MB)"
+        
+    # Print the largest files for debugging
+    print("\nLargest files encountered:")
+    for path, size in stats['largest_files']:
+        print(f"  {path}: {size/1024/1024:.2f} MB")
+        
+    if stats['omitted_files']:
+        return (True, f"Time budget reached: processed {file_count} highest-priority files ({processed_size/1024:.1f} KB){source} in {total_time:.1f} seconds and listed {len(stats['omitted_files'])} omitted files{large_files_info}")
+    
+    return (True, f"Successfully processed {file_count} files ({processed_size/1024:.1f} KB){source} in {total_time:.1f} seconds{large_files_info}")
+
 def process_codebase(output_file, root_pathspec, additional_pathspecs, respect_gitignore=True, 
-                 timeout_seconds=180, skip_large_files=False, max_file_size=1024*1024):
+                 timeout_seconds=180, skip_large_files=False, max_file_size=1024*1024,
+                 prioritize=False, priority_rules=None, recent_days=30, root_dir=None):
     """Process the codebase and write to text file.
     
     Args:
@@ -157,236 +545,289 @@ def process_codebase(output_file, root_pathspec, additional_pathspecs, respect_g
         timeout_seconds: Maximum time in seconds to allow for processing
         skip_large_files: Whether to skip files larger than max_file_size
         max_file_size: Maximum file size in bytes (default 1MB)
+        prioritize: Read files in priority order and, when the timeout fires, finish
+            the snapshot with a list of omitted files instead of failing
+        priority_rules: (pattern, weight) rules for prioritize (default: DEFAULT_PRIORITY_RULES)
+        recent_days: How many days of git history count as recent activity for prioritize
+        root_dir: Project root directory (default: get_root_dir())
     
     Returns:
         Tuple of (success, message)
     """
     import time
-    import sys
-    import platform
     
     # Simple timeout approach that works on all platforms
     start_time = time.time()
     end_time_limit = start_time + timeout_seconds
     
-    root_dir = os.path.dirname(os.path.abspath(__file__)) + '/..'
-    file_count = 0
-    large_file_count = 0
-    processed_size = 0
-    skipped_size = 0
-    
-    # Debugging - track the largest files
-    largest_files = []
-    def track_large_file(path, size):
-        nonlocal largest_files
-        largest_files.append((path, size))
-        largest_files.sort(key=lambda x: x[1], reverse=True)
-        if len(largest_files) > 10:
-            largest_files = largest_files[:10]
-    
-    # Additional directories to always skip
-    always_skip_dirs = [
-        'node_modules',
-        '.git',
-        'build',
-        'dist',
-        '__pycache__',
-        '.cache',
-    ]
-    
-    # Specific files to always skip
-    always_skip_files = [
-        'package-lock.json',
-        'package.json',
-        'codebase_documentation.txt',
-        'codebase_documentation_*.txt',  # Pattern for timestamp versions
-        '*.lock',
-        '*.env',
-        '*.min.js',
-        '*.min.css',
-        '*.map',
-        '*.woff',
-        '*.woff2',
-        '*.ttf',
-        '*.eot',
-        'yarn.lock',
-        'npm-shrinkwrap.json',
-        'composer.lock',
-        'Gemfile.lock',
-        'Cargo.lock',
-        'poetry.lock',
-    ]
+    root_dir = root_dir or get_root_dir()
     
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'w', encoding='utf-8') as snapshot_file:
+            writer = SnapshotWriter(snapshot_file)
+            
             # Write title
-            f.write("# Codebase Documentation\n\n")
+            writer.write("# Codebase Documentation\n\n")
             print("Generating directory tree...")
             
-            # Check for timeout
-            if time.time() > end_time_limit:
+            # Check for timeout. A prioritized run always finishes the snapshot instead,
+            # listing every file as omitted
+            if not prioritize and time.time() > end_time_limit:
                 return (False, f"Timeout exceeded while generating directory tree")
             
             # Write directory structure
-            f.write("## Directory Structure\n\n")
-            tree = generate_directory_tree(root_dir, root_pathspec, additional_pathspecs, respect_gitignore=respect_gitignore)
-            f.write('\n'.join(tree))
-            f.write('\n\n')
+            writer.write("## Directory Structure\n\n")
+            tree = generate_directory_tree(root_dir, root_pathspec, additional_pathspecs, respect_gitignore=respect_gitignore,
+                                           root_dir=root_dir)
+            writer.write('\n'.join(tree))
+            writer.write('\n\n')
             
             # Write file contents
-            f.write("## File Contents\n\n")
+            writer.write("## File Contents\n\n")
             
-            # Keep track of processed files to avoid duplicates
-            processed_files = set()
-            
-            print("Beginning file processing...")
-            progress_interval = 50  # Show progress every 50 files
-            check_timeout_interval = 20  # Check for timeout every 20 files
-            
-            for root, dirs, files in os.walk(root_dir):
-                # Skip problematic directories
-                should_skip = False
-                for skip_dir in always_skip_dirs:
-                    if skip_dir in root.split(os.path.sep):
-                        should_skip = True
-                        break
-                if should_skip:
+            candidates = []
+            for rel_path, file_path in scan_codebase(root_dir, root_pathspec, additional_pathspecs, respect_gitignore):
+                # Specifically check if this is the output file we're currently writing to
+                if os.path.realpath(file_path) == os.path.realpath(output_file):
                     continue
-                    
-                # Remove problem directories from the dirs list so they won't be visited
-                for skip_dir in always_skip_dirs:
-                    if skip_dir in dirs:
-                        dirs.remove(skip_dir)
                 
-                # Check for timeout periodically
-                if time.time() > end_time_limit:
-                    return (False, f"Processing timed out after {timeout_seconds} seconds. Processed {file_count} files ({processed_size/1024:.1f} KB) so far.")
+                # Once a prioritized run is out of time, sizes no longer matter: every
+                # remaining file is going to be listed as omitted
+                if prioritize and time.time() > end_time_limit:
+                    candidates.append((rel_path, 0, None))
+                    continue
                 
-                # Debug output about current directory
-                if file_count % check_timeout_interval == 0:
-                    print(f"Scanning directory: {root}")
-                    
-                # Process each file
-                for file in sorted(files):
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, start=root_dir)
-                    
-                    # Skip if already processed or should be ignored
-                    if rel_path in processed_files or should_ignore(file_path, root_pathspec, additional_pathspecs, respect_gitignore):
-                        continue
-                    
-                    # Skip our own documentation files - prevent circular inclusion 
-                    # or accidentally including the file we're currently writing
-                    if file.startswith('codebase_documentation') and file.endswith('.txt'):
-                        continue
-                    
-                    # Specifically check if this is the output file we're currently writing to
-                    if os.path.samefile(file_path, output_file) if os.path.exists(output_file) else False:
-                        continue
-                    
-                    # Skip specific files we want to exclude
-                    should_skip_file = False
-                    for skip_pattern in always_skip_files:
-                        if fnmatch.fnmatch(file, skip_pattern):
-                            should_skip_file = True
-                            break
-                    if should_skip_file:
-                        continue
-                    
-                    # Check for timeout every few files
-                    if file_count % check_timeout_interval == 0 and time.time() > end_time_limit:
-                        return (False, f"Processing timed out after {timeout_seconds} seconds. Processed {file_count} files ({processed_size/1024:.1f} KB) so far.")
-                    
-                    # Skip files that are likely problematic
-                    file_ext = os.path.splitext(file_path)[1].lower()
-                    if file_ext in ['.log', '.lock', '.bin', '.exe', '.dll', '.o', '.obj', 
-                                   '.pyc', '.pyo', '.so', '.dylib', '.zip', '.tar', '.gz', 
-                                   '.7z', '.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg']:
-                        continue
-                        
-                    # Handle large files
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        
-                        # Track large files for debugging
-                        if file_size > 100 * 1024:  # Larger than 100KB
-                            track_large_file(rel_path, file_size)
-                        
-                        # Skip large files if requested
-                        if file_size > max_file_size:
-                            large_file_count += 1
-                            skipped_size += file_size
-                            
-                            # Always skip extremely large files
-                            if file_size > 10 * 1024 * 1024:  # Larger than 10MB
-                                continue
-                                
-                            if skip_large_files:
-                                f.write(f"### {rel_path}\n\n")
-                                f.write(f"File skipped (too large): {file_size/1024:.1f} KB\n\n")
-                                continue
-                    except Exception:
-                        pass
-                    
-                    processed_files.add(rel_path)
-                    file_count += 1
-                    
-                    # Show progress
-                    if file_count % progress_interval == 0:
-                        elapsed = time.time() - start_time
-                        remaining = end_time_limit - time.time()
-                        print(f"Processed {file_count} files ({processed_size/1024:.1f} KB) in {elapsed:.1f} seconds... (timeout in {remaining:.1f}s)")
-                    
-                    if is_binary_file(file_path):
-                        continue
-                    
-                    try:
-                        # Use a file size limit when reading content
-                        max_readable_size = 1 * 1024 * 1024  # 1MB max readable
-                        if os.path.getsize(file_path) > max_readable_size:
-                            f.write(f"### {rel_path}\n\n")
-                            f.write(f"File content truncated (too large to display in full): {os.path.getsize(file_path)/1024:.1f} KB\n\n")
-                            with open(file_path, 'r', encoding='utf-8', errors='replace') as file_content:
-                                content = file_content.read(max_readable_size)
-                                content += "\n\n... [content truncated] ...\n\n"
-                        else:
-                            with open(file_path, 'r', encoding='utf-8', errors='replace') as file_content:
-                                content = file_content.read()
-                        
-                        processed_size += len(content)
-                        
-                        # Write file header
-                        f.write(f"### {rel_path}\n\n")
-                        
-                        # Write file content with appropriate syntax highlighting
-                        extension = get_file_extension(file_path)
-                        f.write(f"```{extension}\n")
-                        f.write(content)
-                        if not content.endswith('\n'):
-                            f.write('\n')
-                        f.write("```\n\n")
-                    except Exception as e:
-                        f.write(f"### {rel_path}\n\n")
-                        f.write(f"Error reading file: {str(e)}\n\n")
+                # Skip entries that cannot be read, such as dangling symlinks
+                try:
+                    file_size = os.path.getsize(file_path)
+                except OSError:
+                    continue
+                candidates.append((rel_path, file_size, functools.partial(read_worktree_file, file_path)))
+            
+            recent_activity = load_recent_git_activity(root_dir, recent_days, end_time_limit=end_time_limit) if prioritize else None
+            stats = write_file_contents(writer, candidates, end_time_limit, skip_large_files, max_file_size,
+                                        prioritize, priority_rules, recent_activity)
+            if not stats['timed_out']:
+                writer.write_index()
         
-        end_time = time.time()
-        total_time = end_time - start_time
+        return snapshot_result(stats, start_time, timeout_seconds)
+    
+    except Exception as e:
+        elapsed = time.time() - start_time
+        return (False, f"Error processing codebase after {elapsed:.1f} seconds: {str(e)}")
+
+class GitBlobReader:
+    """Read blob contents straight from git object storage.
+    
+    A single long-lived `git cat-file --batch` process serves every read, so
+    snapshotting a revision costs one process rather than one per file.
+    """
+    def __init__(self, root_dir):
+        import subprocess
+        self.process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=root_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+    
+    def read(self, sha):
+        """Return the raw bytes of a blob."""
+        self.process.stdin.write(sha.encode('ascii') + b'\n')
+        self.process.stdin.flush()
+        
+        # Header is "<sha> <type> <size>" or "<sha> missing"
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"Object not found in repository: {sha}")
+        
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # Trailing newline after the object
+        return data
+    
+    def close(self):
+        """Shut down the cat-file process."""
+        if self.process.stdin:
+            self.process.stdin.close()
+        self.process.wait()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def resolve_revision(root_dir, rev):
+    """Resolve a revision name (branch, tag, sha) to a full commit sha."""
+    import subprocess
+    result = subprocess.run(
+        ['git', 'rev-parse', '--verify', '--quiet', f"{rev}^{{commit}}"],
+        cwd=root_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise ValueError(f"Unknown git revision: {rev}")
+    return result.stdout.strip()
+
+def list_revision_files(root_dir, commit):
+    """List every blob in a commit's tree without touching the worktree.
+    
+    Returns:
+        List of (rel_path, blob_sha, size) tuples, rel_path using '/' separators
+    """
+    import subprocess
+    output = subprocess.run(
+        ['git', 'ls-tree', '-r', '-l', '-z', '--full-tree', commit],
+        cwd=root_dir, capture_output=True, check=True
+    ).stdout
+    
+    files = []
+    for record in output.split(b'\0'):
+        if not record:
+            continue
+        meta, path = record.split(b'\t', 1)
+        mode, obj_type, sha, size = meta.split()
+        # Submodules show up as commits; symlinks have no content worth dumping
+        if obj_type != b'blob' or mode == b'120000':
+            continue
+        files.append((path.decode('utf-8', errors='replace'), sha.decode('ascii'), int(size)))
+    return files
+
+def load_revision_pathspecs(reader, files):
+    """Build gitignore PathSpecs from the .gitignore blobs of a revision's own tree.
+    
+    Returns:
+        Tuple of (root_pathspec, additional_pathspecs) in the same shape as
+        load_gitignore_pathspecs
+    """
+    root_pathspec = PathSpec([])
+    additional_pathspecs = {}
+    for rel_path, sha, size in files:
+        parts = rel_path.split('/')
+        if parts[-1] != '.gitignore' or 'node_modules' in parts:
+            continue
         
-        # Add stats about large files if relevant
-        large_files_info = ""
-        if large_file_count > 0:
-            large_files_info = f" (skipped {large_file_count} large files totaling {skipped_size/1024/1024:.1f} MB)"
+        gitignore_content = reader.read(sha).decode('utf-8', errors='replace')
+        pathspec = PathSpec.from_lines(GitWildMatchPattern, gitignore_content.splitlines())
+        if len(parts) == 1:
+            root_pathspec = pathspec
+        else:
+            additional_pathspecs[os.path.join(*parts[:-1])] = pathspec
+    
+    return root_pathspec, additional_pathspecs
+
+def is_ignored_path(root_dir, rel_path, root_pathspec, additional_pathspecs, respect_gitignore=True):
+    """Check a '/'-separated path and each of its parent directories against should_ignore.
+    
+    This mirrors the pruning os.walk gets for free when walking the filesystem.
+    """
+    parts = rel_path.split('/')
+    for depth in range(1, len(parts) + 1):
+        if should_ignore(os.path.join(root_dir, *parts[:depth]), root_pathspec, additional_pathspecs, respect_gitignore, root_dir):
+            return True
+    return False
+
+def is_binary_content(data):
+    """Check if blob content is binary, using the same 1KB UTF-8 probe as is_binary_file."""
+    import codecs
+    try:
+        # An incremental decoder tolerates a multi-byte character cut off at the probe boundary
+        codecs.getincrementaldecoder('utf-8')().decode(data[:1024])
+        return False
+    except UnicodeDecodeError:
+        return True
+
+def read_blob(reader, sha, max_chars):
+    """Read up to max_chars characters of a blob, or return None if it is binary."""
+    data = reader.read(sha)
+    if is_binary_content(data):
+        return None
+    
+    # Apply the same newline translation as reading the file in text mode
+    text = data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+    return text[:max_chars]
+
+def process_revision(output_file, rev, respect_gitignore=True, timeout_seconds=180,
+                     skip_large_files=False, max_file_size=1024*1024,
+                     prioritize=False, priority_rules=None, recent_days=30, root_dir=None):
+    """Write a text snapshot of a git revision, reading everything from object storage.
+    
+    Gitignore rules come from the revision's own .gitignore files, and the same
+    skip lists as process_codebase are applied. The worktree is never read, so
+    this can run alongside normal development on any branch.
+    
+    Args:
+        output_file: Path to the output file
+        rev: Commit, branch or tag to snapshot
+        respect_gitignore: Whether to respect gitignore rules
+        timeout_seconds: Maximum time in seconds to allow for processing
+        skip_large_files: Whether to skip files larger than max_file_size
+        max_file_size: Maximum file size in bytes (default 1MB)
+        prioritize: Read files in priority order and, when the timeout fires, finish
+            the snapshot with a list of omitted files instead of failing
+        priority_rules: (pattern, weight) rules for prioritize (default: DEFAULT_PRIORITY_RULES)
+        recent_days: How many days of git history before the revision count as recent activity
+        root_dir: Repository root directory (default: get_root_dir())
+    
+    Returns:
+        Tuple of (success, message)
+    """
+    import time
+    
+    start_time = time.time()
+    end_time_limit = start_time + timeout_seconds
+    
+    root_dir = root_dir or get_root_dir()
+    
+    try:
+        commit = resolve_revision(root_dir, rev)
+        print(f"Reading tree of {rev} ({commit[:12]})...")
+        files = list_revision_files(root_dir, commit)
+        
+        with GitBlobReader(root_dir) as reader, open(output_file, 'w', encoding='utf-8') as snapshot_file:
+            writer = SnapshotWriter(snapshot_file)
             
-        # Print the largest files for debugging
-        print("\nLargest files encountered:")
-        for path, size in largest_files:
-            print(f"  {path}: {size/1024/1024:.2f} MB")
+            root_pathspec, additional_pathspecs = load_revision_pathspecs(reader, files)
             
-        return (True, f"Successfully processed {file_count} files ({processed_size/1024:.1f} KB) in {total_time:.1f} seconds{large_files_info}")
+            tree_paths = [rel_path for rel_path, sha, size in files
+                          if not is_ignored_path(root_dir, rel_path, root_pathspec, additional_pathspecs, respect_gitignore)]
+            
+            # Write title
+            writer.write("# Codebase Documentation\n\n")
+            writer.write(f"Revision: {rev} ({commit})\n\n")
+            
+            # Write directory structure
+            writer.write("## Directory Structure\n\n")
+            writer.write('\n'.join(generate_tree_from_paths(tree_paths)))
+            writer.write('\n\n')
+            
+            # Write file contents
+            writer.write("## File Contents\n\n")
+            
+            tree_path_set = set(tree_paths)
+            candidates = []
+            for rel_path, sha, file_size in files:
+                parts = rel_path.split('/')
+                if rel_path not in tree_path_set or is_skipped_file(parts[-1]):
+                    continue
+                if any(part in ALWAYS_SKIP_DIRS for part in parts[:-1]):
+                    continue
+                candidates.append((rel_path, file_size, functools.partial(read_blob, reader, sha)))
+            
+            # Order files like os.walk does: a directory's files before its subdirectories
+            candidates.sort(key=lambda c: (c[0].split('/')[:-1], c[0].split('/')[-1]))
+            
+            recent_activity = load_recent_git_activity(root_dir, recent_days, rev=commit,
+                                                       end_time_limit=end_time_limit) if prioritize else None
+            stats = write_file_contents(writer, candidates, end_time_limit, skip_large_files, max_file_size,
+                                        prioritize, priority_rules, recent_activity)
+            if not stats['timed_out']:
+                writer.write_index()
+        
+        return snapshot_result(stats, start_time, timeout_seconds, source=f" from {rev}")
     
     except Exception as e:
         elapsed = time.time() - start_time
-        return (False, f"Error processing codebase after {elapsed:.1f} seconds: {str(e)}")
+        return (False, f"Error processing revision {rev} after {elapsed:.1f} seconds: {str(e)}")
 
 def main():
     """Main function to generate the codebase text file."""
@@ -404,8 +845,35 @@ def main():
     parser.add_argument('--skip-large-files', action='store_true', help='Skip files larger than specified max size')
     parser.add_argument('--max-file-size', type=int, default=1024*1024, 
                       help='Maximum file size in bytes (default: 1MB)')
+    parser.add_argument('--rev', help='Snapshot a git revision (commit, branch or tag) straight from the object store instead of the worktree')
+    parser.add_argument('--prioritize', action='store_true',
+                      help='Read the most valuable files first and, on timeout, write a complete snapshot listing omitted files')
+    parser.add_argument('--priority', action='append', default=[], metavar='PATTERN=WEIGHT',
+                      help='Extra path rule for --prioritize, checked before the defaults (e.g. "backend/routes/*=4"). Can be repeated')
+    parser.add_argument('--recent-days', type=int, default=30,
+                      help='Days of git history that count as recent activity for --prioritize (default: 30)')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    diff_parser = subparsers.add_parser('diff', help='Compare two snapshots using their embedded file indexes')
+    diff_parser.add_argument('old_snapshot', help='Older snapshot file')
+    diff_parser.add_argument('new_snapshot', help='Newer snapshot file')
+    diff_parser.add_argument('--name-status', action='store_true', help='Only list added (A), removed (D) and modified (M) paths')
+    diff_parser.add_argument('--context', type=int, default=3, help='Number of context lines in diffs (default: 3)')
     args = parser.parse_args()
     
+    if args.command == 'diff':
+        try:
+            diff_snapshots(args.old_snapshot, args.new_snapshot, name_status=args.name_status, context_lines=args.context)
+        except (OSError, ValueError) as e:
+            print(f"❌ {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    try:
+        priority_rules = [parse_priority_rule(rule) for rule in args.priority] + DEFAULT_PRIORITY_RULES
+    except ValueError as e:
+        parser.error(str(e))
+    
     print(f"Starting code-to-text conversion with a {args.timeout} second timeout...")
     if args.skip_large_files:
         print(f"Will skip files larger than {args.max_file_size/1024/1024:.1f}MB")
@@ -415,6 +883,9 @@ def main():
     
     # Determine output filename
     output_filename = args.output_file
+    if args.rev:
+        safe_rev = re.sub(r'[^A-Za-z0-9._-]', '_', args.rev)
+        output_filename = f"{os.path.splitext(output_filename)[0]}_{safe_rev}{os.path.splitext(output_filename)[1]}"
     if not args.no_timestamp:
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         output_filename = f"{os.path.splitext(output_filename)[0]}_{timestamp}{os.path.splitext(output_filename)[1]}"
@@ -426,38 +897,42 @@ def main():
     # Use the file in the code-to-text directory
     output_file = os.path.join(code_to_text_dir, output_filename)
     
-    print("Reading .gitignore files...")
-    
-    # Read root gitignore
-    root_gitignore = os.path.join(root_dir, '.gitignore')
-    root_pathspec = read_gitignore(root_gitignore)
-    
-    # Find and read additional gitignore files
-    additional_pathspecs = {}
-    for root, dirs, files in os.walk(root_dir):
-        # Skip node_modules entirely to save time
-        if 'node_modules' in dirs:
-            dirs.remove('node_modules')
-            
-        if '.gitignore' in files and root != root_dir:
-            rel_dir = os.path.relpath(root, start=root_dir)
-            gitignore_path = os.path.join(root, '.gitignore')
-            additional_pathspecs[rel_dir] = read_gitignore(gitignore_path)
-    
     # Whether to respect gitignore rules for documentation files
     respect_gitignore = not args.include_docs
     
-    # Process the codebase with timeout
-    print(f"Processing codebase (timeout: {args.timeout}s)...")
-    success, message = process_codebase(
-        output_file, 
-        root_pathspec, 
-        additional_pathspecs, 
-        respect_gitignore=respect_gitignore,
-        timeout_seconds=args.timeout,
-        skip_large_files=args.skip_large_files,
-        max_file_size=args.max_file_size
-    )
+    if args.rev:
+        # Revision snapshots read .gitignore files from the revision's own tree
+        print(f"Processing revision {args.rev} (timeout: {args.timeout}s)...")
+        success, message = process_revision(
+            output_file,
+            args.rev,
+            respect_gitignore=respect_gitignore,
+            timeout_seconds=args.timeout,
+            skip_large_files=args.skip_large_files,
+            max_file_size=args.max_file_size,
+            prioritize=args.prioritize,
+            priority_rules=priority_rules,
+            recent_days=args.recent_days
+        )
+    else:
+        print("Reading .gitignore files...")
+        
+        root_pathspec, additional_pathspecs = load_gitignore_pathspecs(root_dir)
+        
+        # Process the codebase with timeout
+        print(f"Processing codebase (timeout: {args.timeout}s)...")
+        success, message = process_codebase(
+            output_file, 
+            root_pathspec, 
+            additional_pathspecs, 
+            respect_gitignore=respect_gitignore,
+            timeout_seconds=args.timeout,
+            skip_large_files=args.skip_large_files,
+            max_file_size=args.max_file_size,
+            prioritize=args.prioritize,
+            priority_rules=priority_rules,
+            recent_days=args.recent_days
+        )
     
     if success:
         print(f"✅ {message}")
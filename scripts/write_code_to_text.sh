@@ -43,9 +43,19 @@ while [[ $# -gt 0 ]]; do
       echo "Max file size set to $2 bytes"
       shift 2
       ;;
+    --rev)
+      ARGS="$ARGS --rev $2"
+      echo "Will snapshot git revision: $2"
+      shift 2
+      ;;
+    --prioritize)
+      ARGS="$ARGS --prioritize"
+      echo "Will read the most valuable files first and list omitted files on timeout"
+      shift
+      ;;
     *)
       echo "Unknown option: $1"
-      echo "Usage: $0 [--commit] [--include-docs] [--output-file FILENAME] [--timestamp] [--timeout SECONDS] [--skip-large-files] [--max-file-size BYTES]"
+      echo "Usage: $0 [--commit] [--include-docs] [--output-file FILENAME] [--timestamp] [--timeout SECONDS] [--skip-large-files] [--max-file-size BYTES] [--rev REVISION] [--prioritize]"
       exit 1
       ;;
   esac